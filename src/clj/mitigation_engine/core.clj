@@ -5,15 +5,15 @@
 (ns mitigation-engine.core
   (:require
    [taoensso.telemere :as t]
-   [clojure.core.async :as async]
    [aero.core :refer [read-config]]
-   [mitigation-engine.repr :as repr]
+   [mitigation-engine.queries :as q]
    [mitigation-engine.state.alert :as a]
    [mitigation-engine.state.attack :as at]
    [mitigation-engine.state.attack-graph :as ag]
    [mitigation-engine.state.node :as n]
    [mitigation-engine.state.workflow :as wf]
    [mitigation-engine.state.workflow-instance :as wi]
+   [mitigation-engine.util :as util]
    [mount.core :as mount])
   (:import
    (es.um.mitigation_engine MitigationEngine MitigationConstraintProvider)
@@ -28,8 +28,6 @@
 (mount/defstate config
                 :start (read-config (clojure.java.io/file "config.edn")))
 
-(def impacted-nodes (async/chan 100))
-
 (defn prune-attacks []
   (t/log! {:level :debug
            :msg "Removing attack instances with no attack front"})
@@ -37,25 +35,57 @@
                       (vec (filter #(not (empty? (:attack-front %)))
                                    attacks)))))
 
+(defn- new-attacks
+  "Return the attacks started by the alert, one per attack graph whose
+  initial node it triggers."
+  [alert]
+  (keep (fn [attack-graph]
+          (let [initial-node (ag/get-initial-node attack-graph)]
+            (when (n/triggered? initial-node alert nil)
+              (t/log! {:level :debug
+                       :data {:node initial-node
+                              :alert alert}
+                       :msg "Initial node triggered"})
+              (at/new alert (:id initial-node) attack-graph))))
+        @ag/attack-graphs))
+
 (defn update-state [alert]
-  (t/log! "Updating existing attacks")
-  (t/trace! {:id :existing-attack-update
-             :level :debug
-             :msg nil}
-            (swap! at/attacks (fn [attacks] (vec (map #(at/update % alert) attacks)))))
   (t/log! "Creating new attack instances")
-  (t/trace! {:id :new-attack-create
-             :level :debug
-             :msg nil}
-            (run! (fn [attack-graph]
-                    (let [initial-node (ag/get-initial-node attack-graph)]
-                      (when (n/triggered? initial-node alert nil)
-                        (t/log! {:level :debug
-                                 :data {:node initial-node
-                                        :alert alert}
-                                 :msg "Initial node triggered"})
-                        (swap! at/attacks conj (at/new alert (:id initial-node) attack-graph)))))
-                  @ag/attack-graphs)))
+  (let [created (t/trace! {:id :new-attack-create
+                           :level :debug
+                           :msg nil}
+                          (doall (new-attacks alert)))]
+    (t/log! "Updating existing attacks")
+    ;; Apply both changes in a single swap so the attacks database is
+    ;; only written once per alert.
+    (t/trace! {:id :existing-attack-update
+               :level :debug
+               :msg nil}
+              (swap! at/attacks (fn [attacks]
+                                  (into (mapv #(at/update % alert) attacks)
+                                        created))))))
+
+(def ^:private ^:const mitigation-slots
+  "Number of mitigations the solver may assign per alert."
+  10)
+
+(def ^:private ^:const seconds-limit
+  "Time budget for each solver run."
+  1)
+
+(def ^:private solver-factory
+  ;; Building the factory compiles the constraint streams, so do it once
+  ;; and only build a fresh (non thread-safe) solver per run.
+  (delay
+    (let [termination-config (doto (TerminationConfig.)
+                               (.setSecondsSpentLimit seconds-limit))
+          solver-config (doto (SolverConfig.)
+                          (.withSolutionClass MitigationEngine)
+                          (.withConstraintProviderClass MitigationConstraintProvider)
+                          (.withTerminationConfig termination-config)
+                          (.withEntityClasses
+                           (into-array Class [Mitigation])))]
+      (SolverFactory/create solver-config))))
 
 (defn solve [alert parameters]
   (let [from-java (fn [solution]
@@ -66,9 +96,9 @@
                                        (.getWorkflow %))
                                  (.getMitigations solution))))
         alerts (seq (list alert))
-        workflows (seq @wf/workflows)
-        mitigation-slots 10
-        seconds-limit 1
+        ;; The solver rejects workflows that don't target any of the
+        ;; alert's techniques, so don't instantiate them at all.
+        workflows (seq (wf/targeting (a/mitre-ids alert)))
 
         _ (t/log! {:level :debug
                    :data {:alerts alerts
@@ -79,7 +109,11 @@
         java-workflows (t/trace! {:id :workflow-instantiation
                                   :level :debug
                                   :msg nil}
-                                 (flatten (map #(wf/generate-instances % alert) workflows)))
+                                 ;; Parameter queries may hit the CSA
+                                 ;; platform, so instantiate workflows in
+                                 ;; parallel.
+                                 (into [] cat (pmap #(doall (wf/generate-instances % alert))
+                                                    workflows)))
         java-mitigations (take mitigation-slots (repeatedly #(Mitigation.)))
 
         _ (t/log! {:data {:alerts (count java-alerts)
@@ -92,15 +126,7 @@
                   (.setAlerts java-alerts)
                   (.setWorkflows java-workflows)
                   (.setMitigations java-mitigations))
-        termination-config (doto (TerminationConfig.)
-                             (.setSecondsSpentLimit seconds-limit))
-        solver-config (doto (SolverConfig.)
-                        (.withSolutionClass MitigationEngine)
-                        (.withConstraintProviderClass MitigationConstraintProvider)
-                        (.withTerminationConfig termination-config)
-                        (.withEntityClasses
-                         (into-array Class [Mitigation])))
-        factory (SolverFactory/create solver-config)
+        factory @solver-factory
         solver (.buildSolver factory)
         solution (t/trace! {:id :solver-execution
                             :level :debug
@@ -122,13 +148,22 @@
         (t/log! {:data {:summary summary}
                  :msg "Solution explanation"})))))
 
+(def ^:private compiled-queries
+  ;; Queries come from the attack graph and workflow databases, so keep
+  ;; their compiled forms only while both are unchanged.
+  (util/memoize-last (fn [_ _] (atom {}))))
+
 (defn handle-alert [alert]
   (t/log! {:data {:alert alert}
            :msg "Handling alert"})
   (t/trace! {:level :debug
              :id :alert-handling
              :msg nil}
-            (do
+            ;; Nodes and workflows often share conditions, so cache
+            ;; query results while this alert is being handled.
+            (binding [q/*compiled* (compiled-queries @ag/attack-graphs
+                                                     @wf/workflows)
+                      q/*results* (atom {})]
               (update-state alert)
               (solve alert nil)
               (prune-attacks))))
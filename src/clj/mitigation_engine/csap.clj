@@ -6,7 +6,8 @@
   (:require
    [neo4j-clj.core :as neo4j]
    [mount.core :as mount]
-   [mitigation-engine.core :as core]))
+   [mitigation-engine.core :as core]
+   [mitigation-engine.queries :as q]))
 
 (defn- start-client []
   (let [host (:csap-host core/config)
@@ -23,8 +24,10 @@
           :start (start-client)
           :stop (stop-client client))
 
-;; Execute query
+;; Execute query.  Workflows for different attacks often issue the same
+;; lookup, so results are cached while an alert is being handled.
 (defn check [query & [params]]
-  (with-open [session (neo4j/get-session client)]
-    (neo4j/with-transaction client tx
-      (doall (neo4j/execute tx query (or params {}))))))
+  (let [params (or params {})]
+    (q/cached [::check query params]
+              #(neo4j/with-transaction client tx
+                 (doall (neo4j/execute tx query params))))))
@@ -22,7 +22,9 @@
    [mitigation-engine.core]
    [mitigation-engine.csap]
    [mitigation-engine.nats]
-   [mitigation-engine.server]))
+   [mitigation-engine.server]
+   [mitigation-engine.state.workflow-instance]
+   [mitigation-engine.worker]))
 
 (defn- start []
   (t/log! "Starting server")
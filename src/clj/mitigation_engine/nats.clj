@@ -4,23 +4,38 @@
 
 (ns mitigation-engine.nats
   (:require
+   [taoensso.telemere :as t]
    [monkey.nats.core :as nats]
    [cheshire.core :as json]
+   [clojure.java.io :as io]
    [mount.core :as mount]
    [mitigation-engine.core :as core]
+   [mitigation-engine.worker :as worker]
    [mitigation-engine.state.alert :as alert]))
 
 (defn- nats-message-to-edn
   [message]
+  ;; Parse straight from the message bytes as UTF-8 rather than copying
+  ;; them into a String with the platform charset first.
   (-> message
       (.getData)
-      (String.)
-      (json/parse-string true)))
+      (io/reader)
+      (json/parse-stream true)))
 
 (defn- handle-alert [alert]
-  (-> alert
-      (alert/to-alert)
-      (core/handle-alert)))
+  ;; Handling an alert runs the solver, so hand it to the alert worker.
+  ;; When the queue is full, block the subscription's dispatcher so
+  ;; messages stay pending in NATS instead of being dropped.
+  (when-let [parsed-alert (try
+                            (alert/to-alert alert)
+                            (catch clojure.lang.ExceptionInfo e
+                              (t/log! {:level :warn
+                                       :data (ex-data e)
+                                       :msg "Malformed alert"})
+                              nil))]
+    (when-not (worker/put-alert parsed-alert)
+      (t/log! {:level :warn
+               :msg "Alert queue closed, dropping alert"}))))
 
 (defn- make-client []
   (let [url (str (:nats-host core/config) \: (:nats-port core/config))
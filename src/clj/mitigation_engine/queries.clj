@@ -7,14 +7,105 @@
 (declare ^:dynamic *alert*)
 (declare ^:dynamic *ctx*)
 
+;; Helpers available to :eval queries, which are evaluated inside this
+;; namespace.
+
+(defn- ip->long [ip]
+  ;; Only dotted-quad literals are accepted.  Anything else returns nil
+  ;; rather than going through InetAddress, which would resolve
+  ;; hostnames over DNS.
+  (when-let [[_ & octets] (and (string? ip)
+                               (re-matches #"(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})"
+                                           ip))]
+    (let [octets (map #(Long/parseLong %) octets)]
+      (when (every? #(<= % 255) octets)
+        (reduce (fn [acc b] (+ (bit-shift-left acc 8) b)) 0 octets)))))
+
+(defn in-subnet?
+  "Whether the IPv4 address `ip` belongs to the network of `network-ip`
+  with a prefix length of `mask-bits`.  Returns false if `ip` is not an
+  IPv4 address, and throws if `network-ip` isn't."
+  [ip network-ip mask-bits]
+  (let [network (or (ip->long network-ip)
+                    (throw (ex-info "Expected an IPv4 network address"
+                                    {:network-ip network-ip})))
+        address (ip->long ip)
+        mask (bit-shift-left -1 (- 32 mask-bits))]
+    (boolean (and address
+                  (= (bit-and network mask)
+                     (bit-and address mask))))))
+
+(def ^:dynamic *compiled*
+  "When bound to an atom, compiled queries are kept in it for the extent
+  of the binding.  Bind it to an atom that lives exactly as long as the
+  databases the queries come from, so edits to them don't leave stale
+  compiled code behind."
+  nil)
+
+(def ^:dynamic *results*
+  "When bound to an atom, results passed through `cached` are memoized
+  in it for the extent of the binding.  Bind it around the handling of
+  a single alert so conditions and CSA lookups shared by several nodes
+  or workflows run once."
+  nil)
+
+(defn- lookup-or-compute [cache k f]
+  (if cache
+    (if-let [[_ v] (find @cache k)]
+      v
+      (let [v (f)]
+        (swap! cache assoc k v)
+        v))
+    (f)))
+
+(defn cached
+  "Return the result of calling `f`, memoized under the key `k` in
+  `*results*` when it is bound."
+  [k f]
+  (lookup-or-compute *results* k f))
+
+(defn- compile-eval [form]
+  ;; Compiling a form generates a new class, which costs far more than
+  ;; running it, so compile each form once per *compiled* scope into a
+  ;; function that reads *alert* and *ctx* when called.  Literals such
+  ;; as `true` evaluate to themselves and skip the compiler entirely.
+  (if (or (coll? form) (symbol? form))
+    (lookup-or-compute *compiled* [::eval form]
+                       #(binding [*ns* (find-ns 'mitigation-engine.queries)]
+                          (eval `(fn [] ~form))))
+    (constantly form)))
+
+(defn- run-eval [f alert ctx]
+  (binding [*alert* alert
+            *ctx* ctx]
+    (f)))
+
+(defn- compile-query [query]
+  ;; Resolve each query's type once per *compiled* scope, leaving a
+  ;; function of the alert and context to call on every run.
+  (lookup-or-compute
+   *compiled* [::query query]
+   #(let [[type v] query]
+      (case type
+        :static (constantly v)
+        :alert (fn [alert _] (-> alert (get v) (or nil)))
+        :ctx (fn [_ ctx] (-> ctx (get v) (or nil)))
+        :eval (let [f (compile-eval v)]
+                (fn [alert ctx]
+                  (cached [v alert ctx] (fn [] (run-eval f alert ctx)))))))))
+
+(defn- compile-queries [queries]
+  (lookup-or-compute
+   *compiled* [::queries queries]
+   #(let [compiled (update-vals queries compile-query)]
+      (fn [alert ctx]
+        (update-vals compiled (fn [f] (f alert ctx)))))))
+
 (defn run [query alert ctx]
-  (let [type (first query)
-        v (second query)]
-    (case type
-      :static v
-      :alert (-> alert (get v) (or nil))
-      :ctx (-> ctx (get v) (or nil))
-      :eval (binding [*alert* alert
-                      *ctx* ctx
-                      *ns* (find-ns 'mitigation-engine.queries)]
-              (eval v)))))
+  ((compile-query query) alert ctx))
+
+(defn run-all
+  "Run every query in a map of queries, returning a map of the same keys
+  to their results."
+  [queries alert ctx]
+  ((compile-queries queries) alert ctx))
@@ -7,6 +7,8 @@
    [taoensso.telemere :as t]
    [mitigation-engine.state.alert :as alerts]
    [mitigation-engine.core :as core]
+   [mitigation-engine.worker :as worker]
+   [cheshire.core :as json]
    [compojure.core :refer :all]
    [ring.middleware.json :refer [wrap-json-response wrap-json-body]]
    [ring.util.response :as response]
@@ -25,15 +27,35 @@
       :body {:error "Only application/json supported"}}
      (do ~@args)))
 
+(def ^:private alert-accepted
+  (-> (response/response "{}")
+      (response/status 202)
+      (response/content-type "application/json")))
+
+(def ^:private alert-queue-full
+  {:status 503
+   :headers {"Content-Type" "application/json"}
+   :body {:error "Alert queue full"}})
+
 (defn handle-alert [req]
   (t/log! {:level :debug
            :data {:request req}
            :msg "New request received"})
   (when-json req
     (let [alert (:body req)
-          parsed-alert (alerts/to-alert alert)]
-      (core/handle-alert parsed-alert)
-      (response/response {}))))
+          parsed-alert (when (map? alert)
+                         (try
+                           (alerts/to-alert alert)
+                           (catch clojure.lang.ExceptionInfo e
+                             (t/log! {:level :warn
+                                      :data (ex-data e)
+                                      :msg "Malformed alert"})
+                             nil)))]
+      (if (nil? parsed-alert)
+        (response/bad-request {:error "Malformed alert"})
+        (if (worker/enqueue-alert parsed-alert)
+          alert-accepted
+          alert-queue-full)))))
 
 (defn get-version []
   (let [v (:version core/config)
@@ -44,11 +66,19 @@
      :major v1
      :minor v2}))
 
+(def ^:private version-response
+  ;; The version never changes while running, so encode it once and let
+  ;; wrap-json-response pass the string body through untouched.
+  (delay (-> (get-version)
+             (json/generate-string)
+             (response/response)
+             (response/content-type "application/json"))))
+
 (defmacro make-routes [clients]
   `(routes
+    (GET "/version" [] @version-response)
     (GET "/" [] (response/response nil))
     (POST "/" ~'req (when-json ~'req (response/response nil)))
-    (GET "/version" [] (response/response (get-version)))
     (POST "/alert" ~'req (handle-alert ~'req))))
 
 (defn run-server []
@@ -56,6 +86,7 @@
                  (wrap-json-body {:keywords? true})
                  (wrap-json-response))
              {:port (:port core/config)
+              :max-threads (:server-threads core/config)
               :join? false}))
 
 (defn- start []
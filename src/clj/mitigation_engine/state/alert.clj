@@ -18,48 +18,78 @@
 
 (c/defdb field-mappings "data/field-mappings.edn" ::field-mappings)
 
-(defn to-alert
-  ([data] (to-alert data (first @field-mappings) []))
-  ([data sch path]
+(defn- compile-mappings
+  "Flatten a field mapping into a vector of [path field] pairs, one per
+  extracted field."
+  ([sch] (compile-mappings sch []))
+  ([sch path]
    (reduce-kv
     (fn [acc k v]
-      (if-not (contains? data k)
-        acc
-        (let [value (get data k)
-              full-path (conj path k)]
-          (cond
-            (map? v)
-            (do
-              (when-not (map? value)
-                (throw (ex-info "Expected map"
-                                {:path full-path
-                                 :expected :map
-                                 :got (type value)})))
-              (merge acc (to-alert value v full-path)))
+      (let [full-path (conj path k)]
+        (cond
+          (map? v) (into acc (compile-mappings v full-path))
+          (keyword? v) (conj acc [full-path v])
+          :else acc)))
+    []
+    sch)))
 
-            (keyword? v)
-            (do
-              (when-not (or (string? value)
-                            (number? value)
-                            (boolean? value)
-                            (vector? value)
-                            (nil? value))
-                (throw (ex-info "Expected primitive"
-                                {:path full-path
-                                 :expected :primitive
-                                 :got (type value)})))
-              (assoc acc v value))
+(def ^:private compiled-mappings
+  (util/memoize-last #(compile-mappings (first %))))
 
-            :else acc))))
-    {}
-    sch)))
+(defn- primitive? [value]
+  (or (string? value)
+      (number? value)
+      (boolean? value)
+      (vector? value)
+      (nil? value)))
+
+(defn- extract-field [acc data [path field]]
+  (let [n (count path)]
+    (loop [value data
+           i 0]
+      (cond
+        (= i n)
+        (do
+          (when-not (primitive? value)
+            (throw (ex-info "Expected primitive"
+                            {:path path
+                             :expected :primitive
+                             :got (type value)})))
+          (assoc! acc field value))
+
+        (not (map? value))
+        (throw (ex-info "Expected map"
+                        {:path (subvec path 0 i)
+                         :expected :map
+                         :got (type value)}))
+
+        (contains? value (nth path i))
+        (recur (get value (nth path i)) (inc i))
+
+        :else acc))))
+
+(defn to-alert [data]
+  (let [alert (persistent! (reduce #(extract-field %1 data %2)
+                                   (transient {})
+                                   (compiled-mappings @field-mappings)))]
+    ;; Nodes check their techniques against every alert, so keep the
+    ;; set alongside the alert instead of rebuilding it on each check.
+    (with-meta alert {::mitre-ids (set (:mitre-ids alert))})))
+
+(defn mitre-ids
+  "Return the set of MITRE ATT&CK technique IDs present in the alert."
+  [alert]
+  (or (::mitre-ids (meta alert))
+      (set (:mitre-ids alert))))
 
 (defn to-java [alert]
   (when (s/valid? ::alert alert)
     (Alert. "Alert"
             (LocalDateTime/now)
-            (java.util.ArrayList. (or (map #(MitreTechnique. %) (:mitre-ids alert)) '()))
-            (java.util.HashMap. alert))))
+            (map #(MitreTechnique. %) (:mitre-ids alert))
+            ;; Persistent maps implement java.util.Map, so hand the
+            ;; alert over as is instead of copying it.
+            alert)))
 
 (defn from-java [alert]
   (.getData alert))
@@ -25,7 +25,7 @@
   ;; front is triggered by the alert.
   (let [attack-graph (at/get (:attack-graph-id attack))
         ctx (:ctx attack)]
-    (some #(n/triggered? % alert ctx)
+    (some #(n/triggered? (at/get-node attack-graph %) alert ctx)
           (:attack-front attack))))
 
 (defn new
@@ -33,7 +33,7 @@
   [alert node-id attack-graph]
   (let [attack-graph-id (:id attack-graph)
         node (at/get-node attack-graph node-id)
-        ctx (update-vals (:extract node) #(q/run % alert nil))]
+        ctx (q/run-all (:extract node) alert nil)]
     (t/log! {:level :debug
              :data {:attack-graph attack-graph-id
                     :initial-node node-id
@@ -50,21 +50,22 @@
   [attack alert]
   (let [attack-graph (at/get (:attack-graph-id attack))
         ctx (:ctx attack)
-        updates (map (fn [node]
-                       (cond
-                         (n/triggered? (at/get-node attack-graph node) alert ctx)
-                         (do
-                           (t/log! {:level :debug
-                                    :data {:node node
-                                           :alert alert}
-                                    :msg "Node triggered"})
-                           {:next (at/get-next-nodes attack-graph node)
-                            :ctx (update-vals (:extract node) #(q/run % alert ctx))})
+        updates (map (fn [node-id]
+                       (let [node (at/get-node attack-graph node-id)]
+                         (cond
+                           (n/triggered? node alert ctx)
+                           (do
+                             (t/log! {:level :debug
+                                      :data {:node node-id
+                                             :alert alert}
+                                      :msg "Node triggered"})
+                             {:next (:next node)
+                              :ctx (q/run-all (:extract node) alert ctx)})
 
-                         :else {:next (list node)
-                                :ctx nil}))
+                           :else {:next (list node-id)
+                                  :ctx nil})))
                      (:attack-front attack))
-        new-attack-front (flatten (map :next updates))
+        new-attack-front (distinct (mapcat :next updates))
         new-ctx (apply merge (keep :ctx updates))]
     (-> attack
         (assoc :attack-front new-attack-front)
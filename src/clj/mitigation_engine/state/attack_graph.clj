@@ -5,6 +5,7 @@
 (ns mitigation-engine.state.attack-graph
   (:require
    [clojure.spec.alpha :as s]
+   [mitigation-engine.util :as util]
    [mitigation-engine.state.common :as c]
    [mitigation-engine.state.node :as n]))
 
@@ -20,14 +21,35 @@
   [attack-graph]
   (assoc attack-graph :attacks []))
 
+(def ^:private attack-graphs-by-id
+  (util/memoize-last #(into {} (map (juxt :id identity)) %)))
+
 (defn get [id]
-  (first (filter #(= (:id %) id) @attack-graphs)))
+  (clojure.core/get (attack-graphs-by-id @attack-graphs) id))
 
 (defn nodes [attack-graph]
   (:nodes attack-graph))
 
+(defn- index-nodes [attack-graph]
+  (into {} (map (juxt :id identity)) (nodes attack-graph)))
+
+(def ^:private node-indexes
+  ;; Node index of every graph in the current state, alongside the graph
+  ;; it was built from.  Rebuilt only when the state changes.
+  (util/memoize-last
+   #(into {} (map (juxt :id (juxt identity index-nodes))) %)))
+
+(defn- node-index [attack-graph]
+  (let [[indexed index] (clojure.core/get (node-indexes @attack-graphs)
+                                          (:id attack-graph))]
+    ;; Only reuse the index if it was built from this very graph value;
+    ;; callers may hold an older or newer version of the graph.
+    (if (identical? indexed attack-graph)
+      index
+      (index-nodes attack-graph))))
+
 (defn get-node [attack-graph node-id]
-  (first (filter #(= (:id %) node-id) (nodes attack-graph))))
+  (clojure.core/get (node-index attack-graph) node-id))
 
 (defn get-next-nodes [attack-graph node-id]
   (:next (get-node attack-graph node-id)))
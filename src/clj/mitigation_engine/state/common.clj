@@ -6,7 +6,6 @@
   (:require
    [clojure.edn :as edn]
    [clojure.spec.alpha :as s]
-   [clojure.pprint :as pp]
    [duratom.core :as d]
    [mount.core :as mount]))
 
@@ -49,8 +48,13 @@
     (edn/read (java.io.PushbackReader. r))))
 
 (defn write-db [file x]
-  (with-open [r (clojure.java.io/writer file)]
-    (pp/pprint x r)))
+  ;; The databases are rewritten on every state change, so print them
+  ;; plainly; pretty printing costs far more than the write itself.
+  (with-open [w (clojure.java.io/writer file)]
+    (binding [*out* w
+              *print-length* nil
+              *print-level* nil]
+      (prn x))))
 
 
 (defn start-db [file spec]
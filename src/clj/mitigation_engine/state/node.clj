@@ -8,6 +8,7 @@
    [clojure.set :as set]
    [clojure.spec.alpha :as s]
    [mitigation-engine.queries :as q]
+   [mitigation-engine.state.alert :as a]
    [mitigation-engine.state.common :as c]))
 
 (s/def ::mitre-ids (c/list ::c/mitre-id))
@@ -20,12 +21,19 @@
 (defn triggered? [node alert ctx]
   ;; An alert triggers a node if all the node's MITRE IDs are also in
   ;; the alert, and if all conditions are true.
-  (let [mitre-id-match (set/subset? (set (:mitre-ids node)) (set (:mitre-ids alert)))
-        condition-match (update-vals (:conditions node) #(q/run % alert ctx))]
+  (let [mitre-id-match (set/subset? (set (:mitre-ids node)) (a/mitre-ids alert))
+        ;; Conditions are evaluated in order and stop at the first one
+        ;; that isn't met, and are skipped entirely when the MITRE IDs
+        ;; already rule the node out.
+        unmet-condition (when mitre-id-match
+                          (some (fn [[k query]]
+                                  (when (nil? (q/run query alert ctx))
+                                    k))
+                                (:conditions node)))]
     (t/log! {:level :debug
              :data {:node (:id node)
                     :description (:description node)
                     :mitre-id-match mitre-id-match
-                    :condition-match condition-match}
+                    :unmet-condition unmet-condition}
              :msg "Checking if node was triggered"})
-    (and mitre-id-match (every? some? (vals condition-match)))))
+    (and mitre-id-match (nil? unmet-condition))))
@@ -7,6 +7,7 @@
    [taoensso.telemere :as t]
    [clojure.spec.alpha :as s]
    [mitigation-engine.queries :as q]
+   [mitigation-engine.util :as util]
    [mitigation-engine.state.common :as c]
    [mitigation-engine.state.attack :as a])
   (:import
@@ -23,6 +24,25 @@
 
 (s/def ::workflow-instance (c/dict ::c/mitre-id ::cost ::cost-factor))
 
+(def ^:private workflows-by-mitre-id
+  (util/memoize-last
+   (fn [workflows]
+     (reduce (fn [acc workflow]
+               (reduce #(clojure.core/update %1 %2 (fnil conj #{}) workflow)
+                       acc
+                       (:mitre-ids workflow)))
+             {}
+             workflows))))
+
+(defn targeting
+  "Return the workflows that target at least one of the given MITRE
+  ATT&CK technique IDs, in database order."
+  [mitre-ids]
+  (let [all-workflows @workflows
+        index (workflows-by-mitre-id all-workflows)
+        targeting? (into #{} (mapcat #(get index %)) mitre-ids)]
+    (filter targeting? all-workflows)))
+
 (defn to-java [workflow]
   (when (s/valid? ::workflow workflow)
     (let [technique (set (map #(MitreTechnique. %)
@@ -42,21 +62,33 @@
                       [(.getName param) nil]))})
 
 (defn generate-instances [workflow alert]
-  (keep (fn [attack]
-          (let [ctx (:ctx attack)
-                conditions (update-vals (:conditions workflow) #(q/run % alert ctx))
-                parameters (update-vals (:parameters workflow) #(q/run % alert ctx))]
-            (t/log! {:level :debug
-                     :data {:workflow-signature workflow
-                            :associated-attack attack
-                            :conditions conditions
-                            :parameters parameters}
-                     :msg "Attempting to generate workflow"})
-            (when (every? some? (vals conditions))
+  (if-let [signature (to-java workflow)]
+    (keep (fn [attack]
+            (let [ctx (:ctx attack)
+                  ;; Parameter queries may hit the CSA platform, so only
+                  ;; run them once every condition holds, and stop
+                  ;; checking conditions at the first one that does not.
+                  conditions-met (every? #(some? (q/run % alert ctx))
+                                         (vals (:conditions workflow)))]
               (t/log! {:level :debug
                        :data {:workflow-signature workflow
                               :associated-attack attack
-                              :parameters parameters}
-                       :msg "Workflow instance generated"})
-              (WorkflowInstance. (to-java workflow) parameters 1.0))))
-        @a/attacks))
+                              :conditions-met conditions-met}
+                       :msg "Attempting to generate workflow"})
+              (when conditions-met
+                (let [parameters (q/run-all (:parameters workflow) alert ctx)]
+                  (t/log! {:level :debug
+                           :data {:workflow-signature workflow
+                                  :associated-attack attack
+                                  :parameters parameters}
+                           :msg "Workflow instance generated"})
+                  (WorkflowInstance. signature parameters 1.0)))))
+          @a/attacks)
+    ;; to-java returns nil for workflows that don't match the spec,
+    ;; which can't be instantiated.
+    (do
+      (t/log! {:level :warn
+               :data {:workflow workflow
+                      :problems (s/explain-data ::workflow workflow)}
+               :msg "Skipping invalid workflow"})
+      nil)))
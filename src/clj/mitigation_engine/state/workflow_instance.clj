@@ -9,9 +9,11 @@
    [mitigation-engine.state.common :as c]
    [mitigation-engine.state.workflow :as w]
    [cheshire.core :as json]
+   [mount.core :as mount]
    [org.httpkit.client :as http])
   (:import
    (java.net URI)
+   (org.httpkit.client HttpClient)
    (es.um.mitigation_engine.model Workflow WorkflowInstance MitreTechnique Parameter ParameterType)))
 
 (s/def ::parameters map?)
@@ -20,42 +22,94 @@
 
 (s/def ::workflow-instance (c/dict ::signature ::parameters))
 
+(def ^:private in-flight
+  ;; Requests sent but not yet answered, so they can finish before the
+  ;; client is stopped.
+  (atom #{}))
+
+(def ^:private ^:const stop-timeout-ms
+  "How long to wait for in-flight workflow requests when stopping."
+  10000)
+
+(defn- await-in-flight []
+  (let [deadline (+ (System/currentTimeMillis) stop-timeout-ms)]
+    (doseq [done @in-flight]
+      (when (= ::timeout (deref done
+                                (max 0 (- deadline (System/currentTimeMillis)))
+                                ::timeout))
+        (t/log! {:level :warn
+                 :msg "Workflow instance request still in flight on shutdown"})))))
+
+(mount/defstate client
+                :start (HttpClient.)
+                :stop (do
+                        (await-in-flight)
+                        (.stop client)))
+
+(def ^:private request-options
+  {:content-type :json})
+
 (defn from-java [workflow]
   {:signature (w/from-java (.getSignature workflow))
    :parameters (.getParameters workflow)})
 
-(defn run [workflow-instance]
-  (let [signature (:signature workflow-instance)
-        description (:description signature)
-        url (:url signature)
-        body (:parameters workflow-instance)
-        json-body (json/generate-string body)
-        _ (t/log! {:data {:description description
-                          :url url
-                          :body body}
-                   :msg "Running workflow instance"})
-        response (t/trace! {:level :debug
-                            :id :workflow-execution
-                            :msg nil}
-                           @(http/post url {:body json-body
-                                            :content-type :json}))]
-    (t/log! {:level :debug
-             :data (:body response)
-             :msg "Workflow response"})
-    (cond
-      (not (contains? response :status))
+(defn- handle-response [response]
+  (t/log! {:level :debug
+           :data (:body response)
+           :msg "Workflow response"})
+  (cond
+    (not (contains? response :status))
+    (do
       (t/log! {:level :error
                :data {:response response}
                :msg "Workflow instance execution returned no status code"})
-      (<= 200 (:status response) 299)
-      (do
-        (t/log! {:msg "Workflow instance executed"})
-        (:body response))
-      (<= 300 (:status response) 599)
+      nil)
+    (<= 200 (:status response) 299)
+    (do
+      (t/log! {:msg "Workflow instance executed"})
+      (:body response))
+    (<= 300 (:status response) 599)
+    (do
       (t/log! {:level :warn
                :data {:status-code (:status response)}
                :msg "Workflow instance execution failed"})
-      :else
+      nil)
+    :else
+    (do
       (t/log! {:level :warn
                :data {:status-code (:status response)}
-               :msg "Workflow instance execution returned an unexpected status code"}))))
+               :msg "Workflow instance execution returned an unexpected status code"})
+      nil)))
+
+(defn run
+  "Send the workflow instance to its URL without waiting for the
+  response.  Returns a promise delivered with the response body once
+  the workflow executes successfully, or nil otherwise."
+  [workflow-instance]
+  (let [signature (:signature workflow-instance)
+        description (:description signature)
+        url (:url signature)
+        body (:parameters workflow-instance)
+        json-body (json/generate-string body)]
+    (t/log! {:data {:description description
+                    :url url
+                    :body body}
+             :msg "Running workflow instance"})
+    (let [done (promise)
+          finish (fn []
+                   (swap! in-flight disj done)
+                   (deliver done true))]
+      (swap! in-flight conj done)
+      (try
+        (http/post url
+                   (assoc request-options
+                          :client client
+                          :body json-body)
+                   (fn [response]
+                     (try
+                       (handle-response response)
+                       (finally
+                         (finish)))))
+        (catch Throwable e
+          (finish)
+          (throw e))))))
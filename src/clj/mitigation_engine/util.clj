@@ -6,3 +6,18 @@
 
 (defmacro jlist [& args]
   `(java.util.ArrayList. (list ~@args)))
+
+(defn memoize-last
+  "Like `memoize`, but only remembers the result for the most recent
+  arguments (each compared by identity).  Useful for deriving indexes
+  from the current value of one or more state atoms."
+  [f]
+  (let [cache (atom nil)]
+    (fn [& args]
+      (let [[k v] @cache]
+        (if (and (= (count k) (count args))
+                 (every? true? (map identical? k args)))
+          v
+          (let [v (apply f args)]
+            (reset! cache [args v])
+            v))))))
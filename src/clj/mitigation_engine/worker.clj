@@ -0,0 +1,60 @@
+;; Copyright (C) 2025, 2026 Ekam Puri Nieto (UMU), Antonio Skarmeta
+;; Gomez (UMU), Jorge Bernal Bernabe (UMU).  See LICENSE file in the
+;; project root for details.
+
+(ns mitigation-engine.worker
+  (:require
+   [taoensso.telemere :as t]
+   [clojure.core.async :as async]
+   [mount.core :as mount]
+   [mitigation-engine.core :as core]
+   ;; mount stops states in reverse order of definition.  Load after
+   ;; every state used while handling an alert so the queue is drained
+   ;; before any of them are stopped.
+   [mitigation-engine.csap]
+   [mitigation-engine.state.workflow-instance]))
+
+(def ^:private ^:const alert-queue-size
+  "Number of alerts that may wait to be handled before new ones are
+  rejected, or their sender blocks."
+  100)
+
+(defn- start-alert-worker []
+  ;; Alerts are handled one at a time, in arrival order, on a dedicated
+  ;; thread.  The worker stops once the queue is closed and drained.
+  (let [queue (async/chan alert-queue-size)
+        worker (async/thread
+                 (loop []
+                   (when-some [alert (async/<!! queue)]
+                     (try
+                       (core/handle-alert alert)
+                       (catch Exception e
+                         (t/log! {:level :error
+                                  :data {:exception e
+                                         :alert alert}
+                                  :msg "Alert handling failed"})))
+                     (recur))))]
+    {:queue queue
+     :worker worker}))
+
+(defn- stop-alert-worker [{:keys [queue worker]}]
+  ;; Alerts already accepted are still handled: close the queue and
+  ;; wait for the worker to drain it.
+  (async/close! queue)
+  (async/<!! worker))
+
+(mount/defstate alert-queue
+                :start (start-alert-worker)
+                :stop (stop-alert-worker alert-queue))
+
+(defn enqueue-alert
+  "Queue an alert to be handled in the background.  Returns true if the
+  alert was queued, or nil if the queue is full."
+  [alert]
+  (async/offer! (:queue alert-queue) alert))
+
+(defn put-alert
+  "Queue an alert to be handled in the background, blocking while the
+  queue is full.  Returns false if the queue has been closed."
+  [alert]
+  (async/>!! (:queue alert-queue) alert))
@@ -10,12 +10,15 @@ package es.um.mitigation_engine.model;
 public class MitreTechnique {
     private final String id;
 
+    private final int hash;
+
     public String getId() {
         return id;
     }
 
     public MitreTechnique(String id) {
         this.id = id;
+        this.hash = computeHash(id);
     }
 
     @Override
@@ -23,14 +26,18 @@ public class MitreTechnique {
         return "MitreTechnique [id=" + id + "]";
     }
 
-    @Override
-    public int hashCode() {
+    private static int computeHash(String id) {
         final int prime = 31;
         int result = 1;
         result = prime * result + ((id == null) ? 0 : id.hashCode());
         return result;
     }
 
+    @Override
+    public int hashCode() {
+        return hash;
+    }
+
     @Override
     public boolean equals(Object obj) {
         if (this == obj)
@@ -40,6 +47,8 @@ public class MitreTechnique {
         if (getClass() != obj.getClass())
             return false;
         MitreTechnique other = (MitreTechnique) obj;
+        if (hash != other.hash)
+            return false;
         if (id == null) {
             if (other.id != null)
                 return false;
@@ -42,7 +42,12 @@ public class Workflow {
     }
 
     public boolean applicableTo(Alert alert) {
-        return alert.getTechniques().stream().anyMatch(this.targets::contains);
+        for (MitreTechnique technique : alert.getTechniques()) {
+            if (this.targets.contains(technique)) {
+                return true;
+            }
+        }
+        return false;
     }
 
     public double getCost() {
@@ -7,8 +7,10 @@
 
 package es.um.mitigation_engine.model;
 
+import java.util.Collections;
 import java.util.HashMap;
 import java.util.Map;
+import java.util.Objects;
 
 import clojure.lang.Keyword;
 
@@ -20,10 +22,16 @@ public class WorkflowInstance {
 
     private final double costFactor;
 
+    private final boolean valid;
+
+    private final int cost;
+
     public WorkflowInstance(Workflow signature, Map<Keyword, Object> parameters, double costFactor) {
-        this.signature = signature;
+        this.signature = Objects.requireNonNull(signature, "Workflow instance requires a signature");
         parameters.forEach((k, v) -> this.parameters.put(k, v));
         this.costFactor = costFactor;
+        this.valid = !this.parameters.containsValue(null);
+        this.cost = (int)Math.round(signature.getCost() * costFactor * 1000);
     }
 
     public Workflow getSignature() {
@@ -31,7 +39,7 @@ public class WorkflowInstance {
     }
 
     public Map<Keyword, Object> getParameters() {
-        return parameters;
+        return Collections.unmodifiableMap(parameters);
     }
 
     public double getCostFactor() {
@@ -39,16 +47,11 @@ public class WorkflowInstance {
     }
 
     public int getCost() {
-        return (int)Math.round(signature.getCost() * costFactor * 1000);
+        return cost;
     }
 
     public boolean valid() {
-        for (Object o : this.parameters.values()) {
-            if (o == null) {
-                return false;
-            }
-        }
-        return true;
+        return valid;
     }
 
 